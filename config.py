@@ -34,6 +34,17 @@ CAMERA_INDEX = 0      # Camera device index (0=first camera, 1=second camera, et
 FRAME_WIDTH = 640     # Frame width in pixels (higher = more detail but slower processing)
 FRAME_HEIGHT = 480    # Frame height in pixels (higher = more detail but slower processing)
 
+# Capture latency settings
+# - CAMERA_BUFFER_SIZE: Frames queued by the capture driver. 1 keeps only the newest
+#   frame so detection never works on stale images (the driver default is ~4 frames)
+# - CAMERA_FOURCC: Pixel format requested from the camera. "MJPG" reduces USB bandwidth
+#   and camera-side buffering on most webcams; set to None to keep the driver default
+CAMERA_BUFFER_SIZE = 1
+CAMERA_FOURCC = "MJPG"
+
+# Frames discarded after opening the camera while auto-exposure and white balance settle
+CAMERA_WARMUP_FRAMES = 5
+
 ####################
 # MEDIAPIPE PARAMS #
 ####################
@@ -42,8 +53,34 @@ FRAME_HEIGHT = 480    # Frame height in pixels (higher = more detail but slower
 # Note: These are set in the sleep_detector.py file:
 # - max_num_faces=1: Focus on single user (driver)
 # - refine_landmarks=True: Better accuracy for eye landmarks
-# - min_detection_confidence=0.5: Balance between detection rate and false positives
-# - min_tracking_confidence=0.5: Balance between tracking stability and adaptability
+# - detection confidence 0.5: Balance between detection rate and false positives
+# - tracking confidence 0.5: Balance between tracking stability and adaptability
+#   (both are the defaults of the Face Mesh graph run by face_mesh_graph.py)
+
+# Maximum number of frames inside the Face Mesh graph at the same time
+# - 1 = strictly one frame at a time (lowest latency, lowest throughput)
+# - 2+ = consecutive frames overlap inside the graph (higher throughput)
+MESH_MAX_IN_FLIGHT = 2
+
+# Number of frames whose EAR is computed together in offline video analysis (--video)
+VIDEO_BATCH_SIZE = 16
+
+# Resolution of the image passed to Face Mesh (width, height)
+# Landmarks are returned in normalized [0, 1] coordinates, so the EAR and the
+# full-resolution display are unaffected. Set equal to FRAME_WIDTH/FRAME_HEIGHT
+# to feed full frames (slower, slightly more precise on distant faces)
+MESH_INPUT_WIDTH = 320
+MESH_INPUT_HEIGHT = 240
+
+# Frame cache for skipping Face Mesh inference on near-identical frames
+# - FRAME_CACHE_SIZE: Thumbnail (width, height) used to compare consecutive frames
+# - FRAME_CACHE_THRESHOLD: Mean absolute pixel difference (0-255) below which the
+#   previous landmarks are reused. Set to 0 to disable the cache
+# - FRAME_CACHE_MAX_REUSE: Maximum consecutive frames served from the cache. Eye
+#   closure barely changes a whole-frame thumbnail, so this bounds the added delay
+FRAME_CACHE_SIZE = (80, 60)
+FRAME_CACHE_THRESHOLD = 2.0
+FRAME_CACHE_MAX_REUSE = 2
 
 ####################
 # ALERT SETTINGS   #
@@ -0,0 +1,165 @@
+"""
+SleepDriver Asynchronous Face Mesh Module
+
+This module runs MediaPipe's Face Mesh graph through the lower-level CalculatorGraph
+API instead of the mp.solutions.face_mesh convenience wrapper.
+
+The Solutions API feeds one frame and then blocks until the whole graph is idle, so
+the graph's calculators never work on more than one frame at a time. Here frames are
+pushed into the graph as packets and results are delivered by an output stream
+observer, which lets detection, landmark regression and post-processing of
+consecutive frames overlap.
+"""
+
+import os
+import threading
+
+import mediapipe as mp
+from mediapipe.python import CalculatorGraph, ImageFormat, packet_creator, packet_getter, resource_util
+
+# Face landmark graph used by mp.solutions.face_mesh, relative to the directory
+# containing the mediapipe package (models are resolved relative to it as well)
+_BINARYPB_FILE_PATH = 'mediapipe/modules/face_landmark/face_landmark_front_cpu.binarypb'
+
+# Timestamp step between consecutive frames in microseconds (simulated 30 FPS,
+# as in the Solutions API - the graph only requires increasing timestamps)
+_TIMESTAMP_STEP_US = 33333
+
+class AsyncFaceMesh:
+    """
+    Pipelined Face Mesh running directly on a MediaPipe CalculatorGraph.
+
+    Frames are submitted with submit() and results are passed to a callback on
+    the graph's own thread, in frame order. At most max_in_flight frames are inside
+    the graph at once; submit() blocks when that limit is reached, which keeps
+    latency bounded while still letting consecutive frames overlap.
+
+    Detection and tracking use the graph's default confidence thresholds (0.5).
+    """
+
+    def __init__(self, on_result=None, max_num_faces=1, refine_landmarks=True, max_in_flight=2):
+        """
+        Build the graph and start it.
+
+        Args:
+            on_result (callable, optional): Called as on_result(payload, multi_face_landmarks)
+                                            for every submitted frame; multi_face_landmarks is
+                                            a list of landmark lists, or None if no face was found
+            max_num_faces (int): Maximum number of faces to detect
+            refine_landmarks (bool): Refine eye and lip landmarks with the attention model
+            max_in_flight (int): Maximum number of frames processed concurrently
+        """
+        root_path = os.path.dirname(os.path.dirname(os.path.abspath(mp.__file__)))
+        resource_util.set_resource_dir(root_path)
+
+        self.on_result = on_result
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)  # notified when nothing is in flight
+        self._pending = {}    # timestamp -> payload of frames still inside the graph
+        self._in_flight = 0   # submitted frames whose result callback has not finished
+        self._timestamp = 0
+
+        self._graph = CalculatorGraph(binary_graph_path=os.path.join(root_path, _BINARYPB_FILE_PATH))
+        # Observing timestamp bounds reports frames without a face as empty packets
+        self._graph.observe_output_stream('multi_face_landmarks', self._on_output, True)
+        self._graph.start_run(input_side_packets={
+            'num_faces': packet_creator.create_int(max_num_faces),
+            'with_attention': packet_creator.create_bool(refine_landmarks),
+            'use_prev_landmarks': packet_creator.create_bool(True),
+        })
+
+    @property
+    def in_flight(self):
+        """int: Number of submitted frames whose results have not been delivered yet."""
+        with self._lock:
+            return self._in_flight
+
+    def submit(self, rgb_image, payload=None):
+        """
+        Push an RGB frame into the graph without waiting for its result.
+
+        The image data is copied into the packet, so the caller may reuse its buffer.
+
+        Args:
+            rgb_image (numpy.ndarray): RGB image (uint8, HxWx3)
+            payload: Arbitrary object handed back to on_result with the landmarks
+        """
+        self._slots.acquire()
+        with self._lock:
+            self._timestamp += _TIMESTAMP_STEP_US
+            timestamp = self._timestamp
+            self._pending[timestamp] = payload
+            self._in_flight += 1
+        packet = packet_creator.create_image_frame(image_format=ImageFormat.SRGB, data=rgb_image)
+        self._graph.add_packet_to_input_stream('image', packet.at(timestamp))
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until the results of all submitted frames have been delivered.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds (None waits indefinitely)
+
+        Returns:
+            bool: True if nothing is in flight anymore, False if the timeout expired
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def process(self, rgb_image):
+        """
+        Process a single frame synchronously (used for warm-up and one-off calls).
+
+        Args:
+            rgb_image (numpy.ndarray): RGB image (uint8, HxWx3)
+
+        Returns:
+            list or None: Landmark lists of the detected faces, None if no face was found
+        """
+        done = threading.Event()
+        result = {}
+
+        def deliver(landmarks):
+            result['landmarks'] = landmarks
+            done.set()
+
+        self.submit(rgb_image, _SyncRequest(deliver))
+        done.wait()
+        return result['landmarks']
+
+    def close(self):
+        """Finish processing the frames in flight and release the graph."""
+        self._graph.close()
+
+    def _on_output(self, stream_name, packet):
+        """Graph observer: resolve every pending frame up to the packet's timestamp."""
+        timestamp = packet.timestamp.value
+        landmarks = None if packet.is_empty() else packet_getter.get_proto_list(packet)
+
+        with self._lock:
+            done = sorted(ts for ts in self._pending if ts <= timestamp)
+            resolved = [(ts, self._pending.pop(ts)) for ts in done]
+
+        for ts, payload in resolved:
+            # Earlier frames that produced no output had no face
+            frame_landmarks = landmarks if ts == timestamp else None
+            try:
+                if isinstance(payload, _SyncRequest):
+                    payload.deliver(frame_landmarks)
+                elif self.on_result is not None:
+                    self.on_result(payload, frame_landmarks)
+            except Exception as e:
+                print(f"[ERROR] Face Mesh result callback failed: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    if self._in_flight == 0:
+                        self._idle.notify_all()
+                self._slots.release()
+
+class _SyncRequest:
+    """Marks a frame submitted by AsyncFaceMesh.process() and carries its completion callback."""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
@@ -14,21 +14,33 @@ License: MIT
 import cv2
 import time
 import argparse
+import queue
+import signal
+import threading
+from collections import deque
 import numpy as np
-import pygame
 import mediapipe as mp
-from datetime import datetime
 import os
 
 # Import project modules
 import config
-from utils import play_alarm, log_drowsiness_event, resize_frame
+from face_mesh_graph import AsyncFaceMesh
+from utils import (alarm_worker, initialize_audio, log_drowsiness_event, resize_frame,
+                   njit, NUMBA_AVAILABLE)
 
-# Initialize MediaPipe Face Mesh for facial landmark detection
+# MediaPipe Face Mesh topology and drawing helpers
 mp_face_mesh = mp.solutions.face_mesh
 mp_drawing = mp.solutions.drawing_utils
 mp_drawing_styles = mp.solutions.drawing_styles
 
+# Connections of both eye contours, drawn together in a single call
+FACEMESH_EYES = mp_face_mesh.FACEMESH_LEFT_EYE | mp_face_mesh.FACEMESH_RIGHT_EYE
+
+# Drawing styles and font are constant, so build them once instead of per frame
+TESSELATION_STYLE = mp_drawing_styles.get_default_face_mesh_tesselation_style()
+CONTOURS_STYLE = mp_drawing_styles.get_default_face_mesh_contours_style()
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
 # Define eye landmarks indices based on MediaPipe Face Mesh topology
 # These indices correspond to specific points on the face mesh model
 # Reference: https://github.com/google/mediapipe/blob/master/mediapipe/modules/face_geometry/data/canonical_face_model_uv_visualization.png
@@ -55,6 +67,19 @@ LEFT_EYE_LOWER = LEFT_EYE_INDICES[8:]
 RIGHT_EYE_UPPER = RIGHT_EYE_INDICES[:8]
 RIGHT_EYE_LOWER = RIGHT_EYE_INDICES[8:]
 
+# NumPy index arrays for gathering eyes from a landmark array (see landmarks_to_array)
+LEFT_EYE_INDICES_NP = np.array(LEFT_EYE_INDICES, dtype=np.intp)
+RIGHT_EYE_INDICES_NP = np.array(RIGHT_EYE_INDICES, dtype=np.intp)
+
+# Combined indices for both eyes (left eye first, then right eye) so both can be
+# gathered from the face mesh in a single pass
+EYE_INDICES = np.concatenate((LEFT_EYE_INDICES_NP, RIGHT_EYE_INDICES_NP))
+_EYE_INDEX_LIST = EYE_INDICES.tolist()  # Plain ints index protobuf fields fastest
+
+# Preallocated buffer holding the (x, y) coordinates of both eyes
+# (the EAR only uses the image-plane coordinates, so depth is never gathered)
+_EYE_BUF = np.empty((len(EYE_INDICES), 2), dtype=np.float32)
+
 def parse_arguments():
     """
     Parse command line arguments for customizing the drowsiness detection system.
@@ -69,6 +94,8 @@ def parse_arguments():
         --log: Enable logging of drowsiness events
         --debug: Enable visualization of face mesh and metrics
         --silent: Disable audio alerts
+        --headless: Run without any display windows (stop with Ctrl+C)
+        --video: Analyze a recorded video file offline instead of the camera
     """
     parser = argparse.ArgumentParser(description='Advanced eye-based drowsiness detection system')
     parser.add_argument('--ear', type=float, default=0.17,
@@ -83,11 +110,44 @@ def parse_arguments():
                         help='Show debug information for eye processing')
     parser.add_argument('--silent', action='store_true', default=False,
                         help='Run in silent mode (no alarm sound)')
+    parser.add_argument('--headless', action='store_true', default=False,
+                        help='Run without display windows or keyboard controls (stop with Ctrl+C)')
+    parser.add_argument('--video', type=str, default=None, metavar='PATH',
+                        help='Analyze a recorded video file offline and report drowsiness episodes')
     return parser.parse_args()
 
+def _ear_kernel(eye_landmarks):
+    """
+    Loop-based EAR computation compiled with Numba when it is available.
+
+    Mirrors calculate_ear() without creating temporary arrays: one pass for
+    the eyelid sums and one for the horizontal extent.
+    """
+    upper = 0.0
+    lower = 0.0
+    for i in range(8):
+        upper += eye_landmarks[i, 1]
+    for i in range(8, 16):
+        lower += eye_landmarks[i, 1]
+
+    x_min = eye_landmarks[0, 0]
+    x_max = eye_landmarks[0, 0]
+    for i in range(16):
+        x = eye_landmarks[i, 0]
+        x_min = min(x_min, x)
+        x_max = max(x_max, x)
+
+    eye_width = x_max - x_min
+    if eye_width > 0:
+        return abs(upper - lower) / 8.0 / eye_width
+    return 0.0
+
+if NUMBA_AVAILABLE:
+    _ear_kernel = njit(cache=True, fastmath=True)(_ear_kernel)
+
 def calculate_ear(eye_landmarks):
     """
-    Calculate the Eye Aspect Ratio (EAR) based on 3D landmarks from MediaPipe.
+    Calculate the Eye Aspect Ratio (EAR) based on landmarks from MediaPipe.
 
     The EAR measures the height-to-width ratio of the eye. When eyes are open,
     the EAR value is higher; when eyes close, the EAR value decreases. This metric
@@ -100,7 +160,8 @@ def calculate_ear(eye_landmarks):
     - eye_width: horizontal distance between eye corners
 
     Args:
-        eye_landmarks (list): List of 16 landmarks for one eye (x, y, z coordinates)
+        eye_landmarks (numpy.ndarray): (16, 2) float32 array of (x, y) coordinates
+                                       for one eye, upper lid first then lower lid
 
     Returns:
         float: Calculated Eye Aspect Ratio value (typically between 0.15 and 0.35)
@@ -110,18 +171,18 @@ def calculate_ear(eye_landmarks):
     if len(eye_landmarks) != 16:
         return 0.0
 
-    # Split into upper and lower eyelid landmarks
-    upper_landmarks = eye_landmarks[:8]
-    lower_landmarks = eye_landmarks[8:]
+    # Use the compiled kernel when Numba is installed
+    if NUMBA_AVAILABLE:
+        return _ear_kernel(eye_landmarks)
 
     # Calculate the mean y-value for upper and lower eyelid
     # This approach is more robust than using just a few points
-    upper_y = np.mean([landmark.y for landmark in upper_landmarks])
-    lower_y = np.mean([landmark.y for landmark in lower_landmarks])
+    upper_y = eye_landmarks[:8, 1].mean()
+    lower_y = eye_landmarks[8:, 1].mean()
 
     # Calculate the eye width (horizontal distance between eye corners)
-    eye_width = abs(max([landmark.x for landmark in eye_landmarks]) -
-                   min([landmark.x for landmark in eye_landmarks]))
+    xs = eye_landmarks[:, 0]
+    eye_width = xs.max() - xs.min()
 
     # Calculate vertical distance between eyelids (eye height)
     eye_height = abs(upper_y - lower_y)
@@ -129,21 +190,376 @@ def calculate_ear(eye_landmarks):
     # Calculate EAR = eye_height / eye_width
     # Avoid division by zero
     if eye_width > 0:
-        return eye_height / eye_width
+        return float(eye_height / eye_width)
     return 0.0
 
+def calculate_ear_batch(eye_landmarks):
+    """
+    Calculate the Eye Aspect Ratio for a batch of eyes at once.
+
+    Vectorized counterpart of calculate_ear() used for offline analysis, where
+    many frames are available together.
+
+    Args:
+        eye_landmarks (numpy.ndarray): (N, 16, 2) float32 array of (x, y) coordinates,
+                                       upper lid first then lower lid for each eye
+
+    Returns:
+        numpy.ndarray: (N,) array of EAR values (0.0 where the eye width is zero)
+    """
+    upper_y = eye_landmarks[:, :8, 1].mean(axis=1)
+    lower_y = eye_landmarks[:, 8:, 1].mean(axis=1)
+    xs = eye_landmarks[:, :, 0]
+    eye_width = xs.max(axis=1) - xs.min(axis=1)
+    eye_height = np.abs(upper_y - lower_y)
+    return np.divide(eye_height, eye_width, out=np.zeros_like(eye_height), where=eye_width > 0)
+
 def extract_eye_landmarks(face_landmarks, eye_indices):
     """
     Extract specific eye landmarks from the complete face landmark set.
 
+    The landmark protos are read once and packed into a contiguous array so
+    that the EAR calculation can work with NumPy reductions instead of
+    repeatedly walking the protobuf objects.
+
     Args:
         face_landmarks (MediaPipe.landmarks): Complete set of face landmarks (468 points)
         eye_indices (list): List of indices for the specific eye landmarks to extract
 
     Returns:
-        list: Selected landmarks for the specified eye
+        numpy.ndarray: (len(eye_indices), 2) float32 array of (x, y) coordinates
+    """
+    landmarks = face_landmarks.landmark
+    return np.array([(landmarks[idx].x, landmarks[idx].y)
+                     for idx in eye_indices], dtype=np.float32)
+
+def landmarks_to_array(face_landmarks):
+    """
+    Materialize the complete face mesh as a NumPy array in one bulk conversion.
+
+    Eyes (or any other landmark group) can then be selected with fancy indexing,
+    e.g. lm_array[LEFT_EYE_INDICES_NP]. Converting all landmarks costs more than
+    gather_eyes() when only the 32 eye points are needed, so the detection loop
+    keeps using gather_eyes(); this pays off once further metrics (mouth aspect
+    ratio, head pose) need many more landmarks per frame.
+
+    Args:
+        face_landmarks (MediaPipe.landmarks): Complete set of face landmarks
+
+    Returns:
+        numpy.ndarray: (num_landmarks, 2) float32 array of (x, y) coordinates
     """
-    return [face_landmarks.landmark[idx] for idx in eye_indices]
+    landmarks = face_landmarks.landmark
+    coords = np.fromiter((c for lm in landmarks for c in (lm.x, lm.y)),
+                         dtype=np.float32, count=2 * len(landmarks))
+    return coords.reshape(-1, 2)
+
+def gather_eyes(face_landmarks, buf=_EYE_BUF):
+    """
+    Gather the landmarks of both eyes into a preallocated array in one pass.
+
+    Rows 0-15 hold the left eye and rows 16-31 the right eye, in the same
+    order as LEFT_EYE_INDICES and RIGHT_EYE_INDICES.
+
+    Args:
+        face_landmarks (MediaPipe.landmarks): Complete set of face landmarks (468 points)
+        buf (numpy.ndarray): (32, 2) float32 output buffer (reused across frames)
+
+    Returns:
+        numpy.ndarray: The filled buffer
+    """
+    landmarks = face_landmarks.landmark
+    for i, idx in enumerate(_EYE_INDEX_LIST):
+        landmark = landmarks[idx]
+        buf[i, 0] = landmark.x
+        buf[i, 1] = landmark.y
+    return buf
+
+def render_overlay(texts, overlay, mask):
+    """
+    Render the on-screen status texts onto a blank overlay and its mask.
+
+    The overlay is only re-rendered when the texts change; every frame then
+    receives it with a single masked copy instead of several putText calls.
+
+    Args:
+        texts (tuple): (text, origin, scale, color, thickness) entries to draw
+        overlay (numpy.ndarray): BGR image receiving the colored text
+        mask (numpy.ndarray): Single-channel image marking the text pixels
+    """
+    overlay.fill(0)
+    mask.fill(0)
+    # Hard-edged text keeps the mask binary, so the masked copy gives the same
+    # pixels as drawing on the frame directly (an anti-aliased mask would copy
+    # edge pixels blended against the black overlay)
+    for text, origin, scale, color, thickness in texts:
+        cv2.putText(overlay, text, origin, FONT, scale, color, thickness, lineType=cv2.LINE_8)
+        cv2.putText(mask, text, origin, FONT, scale, 255, thickness, lineType=cv2.LINE_8)
+
+def put_latest(frame_queue, item):
+    """
+    Put an item into a size-1 queue, replacing any item not yet consumed.
+
+    Dropping the stale entry instead of blocking keeps every pipeline stage
+    working on the freshest frame, the same discipline as a camera buffer of 1.
+    Safe to call from several producer threads.
+
+    Args:
+        frame_queue (queue.Queue): Queue created with maxsize=1
+        item: Item to publish (None signals end of stream)
+    """
+    while True:
+        try:
+            frame_queue.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                frame_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+def capture_frames(vs, frame_queue, stop_event):
+    """
+    Pipeline stage 1: read frames from the camera.
+
+    Runs in its own thread so that camera I/O overlaps with inference. Frames are
+    resized to the configured dimensions if the camera ignored the request.
+
+    Args:
+        vs (cv2.VideoCapture): Opened video capture device
+        frame_queue (queue.Queue): Size-1 output queue of BGR frames
+        stop_event (threading.Event): Set when the application is shutting down
+    """
+    # Whether captured frames need resizing (decided on the first frame)
+    need_resize = None
+
+    while not stop_event.is_set():
+        # Grab a frame from the video stream
+        ret, frame = vs.read()
+
+        # Check if frame was successfully captured
+        if not ret:
+            print("[ERROR] Failed to grab frame - check your camera connection")
+            put_latest(frame_queue, None)
+            return
+
+        # Check once whether the camera honored the requested resolution
+        if need_resize is None:
+            need_resize = (frame.shape[1], frame.shape[0]) != (config.FRAME_WIDTH, config.FRAME_HEIGHT)
+            if need_resize:
+                print(f"[WARNING] Camera delivers {frame.shape[1]}x{frame.shape[0]} instead of "
+                      f"{config.FRAME_WIDTH}x{config.FRAME_HEIGHT} - frames will be resized")
+
+        # Resize the frame to configured dimensions (only if the camera did not)
+        if need_resize:
+            frame = resize_frame(frame, config.FRAME_WIDTH, config.FRAME_HEIGHT)
+
+        put_latest(frame_queue, frame)
+
+def process_frames(face_mesh, frame_queue, result_queue, stop_event, cache_reset):
+    """
+    Pipeline stage 2: feed captured frames into the Face Mesh graph.
+
+    Converts each frame to RGB and downscales it for inference, then either
+    submits it to the graph or, when the frame is nearly unchanged and nothing
+    is in flight, republishes the previous landmarks. Graph results are passed
+    to the display stage from the graph's own thread as they complete.
+
+    Args:
+        face_mesh (AsyncFaceMesh): Running Face Mesh graph
+        frame_queue (queue.Queue): Size-1 input queue of BGR frames
+        result_queue (queue.Queue): Size-1 output queue of (frame, multi_face_landmarks) pairs
+        stop_event (threading.Event): Set when the application is shutting down
+        cache_reset (threading.Event): Set to discard the cached results
+    """
+    # RGB conversion buffer, reused across frames of the same shape
+    rgb_frame = None
+
+    # Downscaled Face Mesh input buffer
+    mesh_size = (config.MESH_INPUT_WIDTH, config.MESH_INPUT_HEIGHT)
+    mesh_input = None
+
+    # Frame cache state: thumbnail of the last frame sent to Face Mesh and the
+    # most recent landmarks delivered by the graph
+    prev_small = None
+    prev_landmarks = None
+    cache_hits = 0
+
+    def on_result(frame, multi_face_landmarks):
+        nonlocal prev_landmarks
+        prev_landmarks = multi_face_landmarks
+        put_latest(result_queue, (frame, multi_face_landmarks))
+
+    face_mesh.on_result = on_result
+
+    while not stop_event.is_set():
+        try:
+            frame = frame_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+
+        # End of stream - propagate to the display stage. The frames still inside
+        # the graph deliver their results first; published afterwards they would
+        # replace the sentinel in the size-1 result queue and it would be lost
+        if frame is None:
+            face_mesh.wait_idle()
+            put_latest(result_queue, None)
+            return
+
+        if cache_reset.is_set():
+            cache_reset.clear()
+            prev_small = None
+
+        # Convert BGR (OpenCV) to RGB (MediaPipe) color format into the reusable buffer
+        if rgb_frame is None or rgb_frame.shape != frame.shape:
+            rgb_frame = np.empty_like(frame)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+
+        # Downscale the Face Mesh input; the full-resolution frame is kept for display
+        if mesh_size == (frame.shape[1], frame.shape[0]):
+            mesh_input = rgb_frame
+        else:
+            if mesh_input is None or mesh_input.shape[:2] != (mesh_size[1], mesh_size[0]):
+                mesh_input = np.empty((mesh_size[1], mesh_size[0], 3), dtype=np.uint8)
+            cv2.resize(rgb_frame, mesh_size, dst=mesh_input, interpolation=cv2.INTER_AREA)
+
+        # Compare a small thumbnail against the last processed frame; when the
+        # scene is practically unchanged, reuse the cached landmarks instead of
+        # running the (expensive) Face Mesh inference again. Only done when the
+        # graph is idle, so the cached landmarks belong to that last frame and
+        # results are never published out of order
+        small = cv2.resize(mesh_input, config.FRAME_CACHE_SIZE, interpolation=cv2.INTER_AREA)
+        if (prev_small is not None
+                and cache_hits < config.FRAME_CACHE_MAX_REUSE
+                and face_mesh.in_flight == 0
+                and cv2.absdiff(small, prev_small).mean() < config.FRAME_CACHE_THRESHOLD):
+            put_latest(result_queue, (frame, prev_landmarks))
+            cache_hits += 1
+        else:
+            # Hand the frame to the Face Mesh graph; the landmarks arrive in on_result
+            face_mesh.submit(mesh_input, frame)
+            prev_small = small
+            cache_hits = 0
+
+def analyze_video(args):
+    """
+    Analyze a recorded video offline and report the drowsiness episodes it contains.
+
+    Frames are pushed through the Face Mesh graph as fast as it accepts them, eye
+    landmarks are collected into batches of VIDEO_BATCH_SIZE frames, and the EAR of
+    a whole batch is computed with a single vectorized call. The same smoothing and
+    threshold logic as the live detector then runs over the batch.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments (uses video, ear,
+                                   frames and log)
+    """
+    vs = cv2.VideoCapture(args.video)
+    if not vs.isOpened():
+        print(f"[ERROR] Could not open video file: {args.video}")
+        return
+    fps = vs.get(cv2.CAP_PROP_FPS) or 30.0
+
+    # Eye landmarks of processed frames, delivered from the graph's thread in frame order
+    eye_queue = queue.Queue()
+
+    def on_result(frame_index, multi_face_landmarks):
+        eyes = None
+        if multi_face_landmarks:
+            eyes = gather_eyes(multi_face_landmarks[0], np.empty_like(_EYE_BUF))
+        eye_queue.put((frame_index, eyes))
+
+    face_mesh = AsyncFaceMesh(
+        on_result=on_result,
+        max_num_faces=1,
+        refine_landmarks=True,
+        max_in_flight=config.MESH_MAX_IN_FLIGHT
+    )
+
+    # Batch buffers: eye landmarks, whether a face was found, and frame indices
+    batch_size = config.VIDEO_BATCH_SIZE
+    batch = np.zeros((batch_size, len(EYE_INDICES), 2), dtype=np.float32)
+    has_face = np.zeros(batch_size, dtype=bool)
+    frame_indices = []
+
+    # Drowsiness state, as in the live detector
+    counter = 0
+    alarm_on = False
+    ear_history = deque(maxlen=5)
+    events = []
+
+    def evaluate_batch():
+        nonlocal counter, alarm_on
+        count = len(frame_indices)
+        ears = (calculate_ear_batch(batch[:count, :16]) + calculate_ear_batch(batch[:count, 16:])) / 2.0
+
+        for i in range(count):
+            if not has_face[i]:
+                counter = max(0, counter - 1)
+                continue
+
+            ear_history.append(ears[i])
+            smoothed_ear = sum(ear_history) / len(ear_history)
+
+            if smoothed_ear < args.ear:
+                counter += 1
+                if counter >= args.frames and not alarm_on:
+                    alarm_on = True
+                    seconds = frame_indices[i] / fps
+                    events.append(seconds)
+                    print(f"[INFO] Drowsiness detected at {seconds:.1f}s (frame {frame_indices[i]})")
+                    if args.log:
+                        log_drowsiness_event()
+            elif smoothed_ear > (args.ear + 0.02):
+                counter = max(0, counter - 1)
+                if counter == 0:
+                    alarm_on = False
+
+        frame_indices.clear()
+
+    def drain():
+        while True:
+            try:
+                frame_index, eyes = eye_queue.get_nowait()
+            except queue.Empty:
+                return
+            slot = len(frame_indices)
+            has_face[slot] = eyes is not None
+            if eyes is not None:
+                batch[slot] = eyes
+            frame_indices.append(frame_index)
+            if len(frame_indices) == batch_size:
+                evaluate_batch()
+
+    print(f"[INFO] Analyzing video: {args.video}")
+    mesh_size = (config.MESH_INPUT_WIDTH, config.MESH_INPUT_HEIGHT)
+    submitted = 0
+    try:
+        while True:
+            ret, frame = vs.read()
+            if not ret:
+                break
+
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if mesh_size != (frame.shape[1], frame.shape[0]):
+                rgb_frame = cv2.resize(rgb_frame, mesh_size, interpolation=cv2.INTER_AREA)
+            face_mesh.submit(rgb_frame, submitted)
+            submitted += 1
+
+            drain()
+    finally:
+        # Wait for the frames still inside the graph and release the video,
+        # also if the loop was interrupted
+        face_mesh.close()
+        vs.release()
+
+    # Evaluate the results of the remaining frames, including the last partial batch
+    drain()
+    if frame_indices:
+        evaluate_batch()
+
+    print(f"[INFO] Processed {submitted} frames ({submitted / fps:.1f}s of video)")
+    print(f"[INFO] Drowsiness episodes detected: {len(events)}")
 
 def main():
     """
@@ -166,220 +582,295 @@ def main():
         from utils import initialize_logger
         initialize_logger(config.LOG_FILE)
 
-    # Initialize pygame for sound alerts
-    pygame.mixer.init()
+    # Offline analysis of a recorded video - no camera, display or alarm
+    if args.video:
+        analyze_video(args)
+        return
+
+    # Initialize pygame and load the alarm sound once for sound alerts
+    initialize_audio(config.ALARM_SOUND, config.ALARM_VOLUME)
 
     # Initialize MediaPipe Face Mesh with optimal parameters
     # - max_num_faces=1: Focus on the driver only
     # - refine_landmarks=True: Get more accurate eye landmarks
-    # - min_detection_confidence: Threshold for face detection
-    # - min_tracking_confidence: Threshold for landmark tracking
-    face_mesh = mp_face_mesh.FaceMesh(
+    # - max_in_flight: Frames allowed to overlap inside the graph
+    face_mesh = AsyncFaceMesh(
         max_num_faces=1,
         refine_landmarks=True,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
+        max_in_flight=config.MESH_MAX_IN_FLIGHT
     )
 
+    # Run one inference on a blank image so the model's lazy initialization
+    # happens now rather than stalling the first camera frame
+    face_mesh.process(np.zeros((config.MESH_INPUT_HEIGHT, config.MESH_INPUT_WIDTH, 3), dtype=np.uint8))
+
+    # Trigger JIT compilation of the EAR kernel before the first real frame
+    calculate_ear(np.zeros((16, 2), dtype=np.float32))
+
     # Initialize state variables for drowsiness detection
     COUNTER = 0          # Counter for consecutive frames below threshold
     ALARM_ON = False     # Flag to track if alarm is currently active
 
     # Initialize sliding window for EAR value smoothing (reduces false positives)
-    ear_history = []
+    # A fixed-size deque plus a running sum keeps each update O(1)
+    ear_history = deque(maxlen=5)
+    ear_sum = 0.0
 
     # Initialize video capture from the specified camera
     print("[INFO] Starting video stream...")
     vs = cv2.VideoCapture(args.camera)
 
+    # Keep only the newest frame in the capture queue to minimize alert latency
+    vs.set(cv2.CAP_PROP_BUFFERSIZE, config.CAMERA_BUFFER_SIZE)
+    if config.CAMERA_FOURCC:
+        vs.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config.CAMERA_FOURCC))
+
     # Set frame dimensions for consistent processing
     vs.set(cv2.CAP_PROP_FRAME_WIDTH, config.FRAME_WIDTH)
     vs.set(cv2.CAP_PROP_FRAME_HEIGHT, config.FRAME_HEIGHT)
 
-    # Allow the camera sensor to warm up
-    time.sleep(1.0)
+    # Allow the camera sensor to warm up: discard the first frames while
+    # auto-exposure and white balance converge
+    for _ in range(config.CAMERA_WARMUP_FRAMES):
+        vs.read()
 
     # Display control instructions
-    print("[INFO] Press 'q' to quit the application")
-    print("[INFO] Press 'd' to toggle debug mode")
-    print("[INFO] Press 'r' to reset counters")
-
-    # Debug mode flag (can be toggled during execution)
-    debug_mode = args.debug
-
-    # Main processing loop - process frames until user quits
-    while True:
-        # Grab a frame from the video stream
-        ret, frame = vs.read()
-
-        # Check if frame was successfully captured
-        if not ret:
-            print("[ERROR] Failed to grab frame - check your camera connection")
-            break
-
-        # Resize the frame to configured dimensions
-        frame = resize_frame(frame, config.FRAME_WIDTH, config.FRAME_HEIGHT)
-
-        # Convert BGR (OpenCV) to RGB (MediaPipe) color format
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-        # Process the frame with MediaPipe Face Mesh
-        # Results contain detected face landmarks (if any)
-        results = face_mesh.process(rgb_frame)
-
-        # Default status - assume awake unless proven otherwise
-        status_text = "Status: Awake"
-
-        # Create a separate debug frame if in debug mode
-        if debug_mode:
-            debug_frame = frame.copy()
-
-        # Check if face landmarks were detected
-        if results.multi_face_landmarks:
-            # Get the first face (driver's face)
-            face_landmarks = results.multi_face_landmarks[0]
-
-            # Draw face mesh visualization if in debug mode
+    if args.headless:
+        print("[INFO] Running headless - press Ctrl+C to stop")
+    else:
+        print("[INFO] Press 'q' to quit the application")
+        print("[INFO] Press 'd' to toggle debug mode")
+        print("[INFO] Press 'r' to reset counters")
+
+    # Debug mode flag (can be toggled during execution, never used headless)
+    debug_mode = args.debug and not args.headless
+
+    # Debug view buffer, allocated once on first use and reused for every frame
+    debug_frame = None
+
+    # On-screen timestamp, re-formatted only when the second changes
+    timestamp_second = None
+    timestamp = ""
+
+    # Cached status overlay and the texts it was rendered from
+    overlay = None
+    overlay_mask = None
+    overlay_key = None
+
+    # Start the capture and inference stages in background threads; the main
+    # thread handles drowsiness logic, display and keyboard input
+    stop_event = threading.Event()
+    cache_reset = threading.Event()
+
+    # Without a window there is no 'q' key, so Ctrl+C requests a clean shutdown
+    if args.headless:
+        signal.signal(signal.SIGINT, lambda signum, stack: stop_event.set())
+    frame_queue = queue.Queue(maxsize=1)
+    result_queue = queue.Queue(maxsize=1)
+    workers = [
+        threading.Thread(target=capture_frames, args=(vs, frame_queue, stop_event), daemon=True),
+        threading.Thread(target=process_frames,
+                         args=(face_mesh, frame_queue, result_queue, stop_event, cache_reset),
+                         daemon=True),
+    ]
+    # Alarm playback runs in its own thread; the detection loop only signals it
+    alarm_event = threading.Event()
+    if not args.silent:
+        workers.append(threading.Thread(
+            target=alarm_worker,
+            args=(alarm_event, stop_event, config.ALARM_SOUND, config.ALARM_VOLUME),
+            daemon=True))
+    for worker in workers:
+        worker.start()
+
+    try:
+        # Main processing loop - process frames until user quits
+        while not stop_event.is_set():
+            # Wait for the next processed frame
+            try:
+                item = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            # Stream ended (camera failure)
+            if item is None:
+                break
+            frame, multi_face_landmarks = item
+
+            # Default status - assume awake unless proven otherwise
+            status_text = "Status: Awake"
+
+            # Texts to display on the frame: (text, origin, scale, color, thickness)
+            overlay_texts = []
+
+            # Copy the frame into the reusable debug buffer if in debug mode
             if debug_mode:
-                # Draw full face mesh tesselation (triangles)
-                mp_drawing.draw_landmarks(
-                    image=debug_frame,
-                    landmark_list=face_landmarks,
-                    connections=mp_face_mesh.FACEMESH_TESSELATION,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_tesselation_style()
-                )
-                # Draw left eye contours for better visualization
-                mp_drawing.draw_landmarks(
-                    image=debug_frame,
-                    landmark_list=face_landmarks,
-                    connections=mp_face_mesh.FACEMESH_LEFT_EYE,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_contours_style()
-                )
-                # Draw right eye contours for better visualization
-                mp_drawing.draw_landmarks(
-                    image=debug_frame,
-                    landmark_list=face_landmarks,
-                    connections=mp_face_mesh.FACEMESH_RIGHT_EYE,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_contours_style()
-                )
-
-            # Extract landmarks for both eyes
-            left_eye_landmarks = extract_eye_landmarks(face_landmarks, LEFT_EYE_INDICES)
-            right_eye_landmarks = extract_eye_landmarks(face_landmarks, RIGHT_EYE_INDICES)
-
-            # Calculate EAR for both eyes
-            left_ear = calculate_ear(left_eye_landmarks)
-            right_ear = calculate_ear(right_eye_landmarks)
-
-            # Average the EAR values from both eyes
-            # This helps with robustness - if one eye is partially occluded or blinks
-            ear = (left_ear + right_ear) / 2.0
-
-            # Apply temporal smoothing: add to history and keep last 5 values
-            # This reduces noise and prevents false positives from quick blinks
-            ear_history.append(ear)
-            if len(ear_history) > 5:
-                ear_history.pop(0)  # Remove oldest value (sliding window)
-
-            # Calculate smoothed EAR value (average of recent values)
-            smoothed_ear = sum(ear_history) / len(ear_history)
-
-            # Display the EAR value on the frame
-            cv2.putText(frame, f"EAR: {smoothed_ear:.2f}", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, config.TEXT_COLOR, 2)
+                if debug_frame is None or debug_frame.shape != frame.shape:
+                    debug_frame = np.empty_like(frame)
+                np.copyto(debug_frame, frame)
 
-            # Drowsiness detection: check if EAR is below threshold
-            if smoothed_ear < args.ear:
-                # Increment frame counter for closed eyes
-                COUNTER += 1
+            # Check if face landmarks were detected
+            if multi_face_landmarks:
+                # Get the first face (driver's face)
+                face_landmarks = multi_face_landmarks[0]
 
-                # Display counter in debug mode
+                # Draw face mesh visualization if in debug mode
                 if debug_mode:
-                    cv2.putText(frame, f"Closed frames: {COUNTER}/{args.frames}", (10, 120),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-                # Check if eyes closed for sufficient consecutive frames
-                if COUNTER >= args.frames:
-                    # If alarm is not already on, trigger it
-                    if not ALARM_ON:
-                        ALARM_ON = True
-
-                        # Play alarm sound unless silent mode is enabled
-                        if not args.silent:
-                            play_alarm(config.ALARM_SOUND, config.ALARM_VOLUME)
-
-                        # Log the drowsiness event if logging is enabled
-                        if args.log:
-                            log_drowsiness_event(config.LOG_FILE)
-
-                    # Update status text to indicate drowsiness
-                    status_text = "Status: DROWSY!"
-
-                    # Draw alert message on the frame
-                    cv2.putText(frame, "WAKE UP!", (10, frame.shape[0] - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, config.TEXT_COLOR, 2)
+                    # Draw full face mesh tesselation (triangles)
+                    mp_drawing.draw_landmarks(
+                        image=debug_frame,
+                        landmark_list=face_landmarks,
+                        connections=mp_face_mesh.FACEMESH_TESSELATION,
+                        landmark_drawing_spec=None,
+                        connection_drawing_spec=TESSELATION_STYLE
+                    )
+                    # Draw both eye contours for better visualization
+                    mp_drawing.draw_landmarks(
+                        image=debug_frame,
+                        landmark_list=face_landmarks,
+                        connections=FACEMESH_EYES,
+                        landmark_drawing_spec=None,
+                        connection_drawing_spec=CONTOURS_STYLE
+                    )
+
+                # Extract landmarks for both eyes in a single pass
+                eye_landmarks = gather_eyes(face_landmarks)
+
+                # Calculate EAR for both eyes
+                left_ear = calculate_ear(eye_landmarks[:16])
+                right_ear = calculate_ear(eye_landmarks[16:])
+
+                # Average the EAR values from both eyes
+                # This helps with robustness - if one eye is partially occluded or blinks
+                ear = (left_ear + right_ear) / 2.0
+
+                # Apply temporal smoothing: add to history and keep last 5 values
+                # This reduces noise and prevents false positives from quick blinks
+                if len(ear_history) == ear_history.maxlen:
+                    ear_sum -= ear_history[0]  # Oldest value drops out of the window
+                ear_history.append(ear)
+                ear_sum += ear
+
+                # Calculate smoothed EAR value (average of recent values)
+                smoothed_ear = ear_sum / len(ear_history)
+
+                # Display the EAR value on the frame
+                overlay_texts.append((f"EAR: {smoothed_ear:.2f}", (10, 30), 0.7, config.TEXT_COLOR, 2))
+
+                # Drowsiness detection: check if EAR is below threshold
+                if smoothed_ear < args.ear:
+                    # Increment frame counter for closed eyes
+                    COUNTER += 1
+
+                    # Display counter in debug mode
+                    if debug_mode:
+                        overlay_texts.append((f"Closed frames: {COUNTER}/{args.frames}", (10, 120),
+                                              0.7, (0, 0, 255), 2))
+
+                    # Check if eyes closed for sufficient consecutive frames
+                    if COUNTER >= args.frames:
+                        # If alarm is not already on, trigger it
+                        if not ALARM_ON:
+                            ALARM_ON = True
+
+                            # Play alarm sound unless silent mode is enabled
+                            if not args.silent:
+                                alarm_event.set()
+
+                            # Log the drowsiness event if logging is enabled
+                            if args.log:
+                                log_drowsiness_event()
+
+                        # Update status text to indicate drowsiness
+                        status_text = "Status: DROWSY!"
+
+                        # Draw alert message on the frame
+                        overlay_texts.append(("WAKE UP!", (10, frame.shape[0] - 10),
+                                              0.7, config.TEXT_COLOR, 2))
+                else:
+                    # Only reset counter if we're above the threshold by a good margin
+                    # This prevents flickering around the threshold value
+                    if smoothed_ear > (args.ear + 0.02):
+                        # Gradual decrease to avoid rapid state changes
+                        COUNTER = max(0, COUNTER - 1)
+
+                        # Only turn off alarm after counter has been reset to zero
+                        if COUNTER == 0:
+                            ALARM_ON = False
             else:
-                # Only reset counter if we're above the threshold by a good margin
-                # This prevents flickering around the threshold value
-                if smoothed_ear > (args.ear + 0.02):
-                    # Gradual decrease to avoid rapid state changes
-                    COUNTER = max(0, COUNTER - 1)
-
-                    # Only turn off alarm after counter has been reset to zero
-                    if COUNTER == 0:
-                        ALARM_ON = False
-        else:
-            # No face detected - display message in debug mode
+                # No face detected - display message in debug mode
+                if debug_mode:
+                    overlay_texts.append(("No face detected", (10, 150), 0.7, (0, 0, 255), 2))
+
+                # Gradually decrease counter when no face is detected
+                # This prevents immediate reset if face detection temporarily fails
+                COUNTER = max(0, COUNTER - 1)
+
+            # Nothing is displayed in headless mode
+            if args.headless:
+                continue
+
+            # Display the current status on the frame
+            overlay_texts.append((status_text, (10, 60), 0.7, config.TEXT_COLOR, 2))
+
+            # Display timestamp on the frame for logging purposes
+            now = int(time.time())
+            if now != timestamp_second:
+                timestamp_second = now
+                timestamp = time.strftime("%A %d %B %Y %I:%M:%S%p", time.localtime(now))
+            overlay_texts.append((timestamp, (10, frame.shape[0] - 40), 0.4, (0, 0, 255), 1))
+
+            # Re-render the overlay only when its texts change, then blit it onto the frame
+            texts = tuple(overlay_texts)
+            if overlay is None or overlay.shape != frame.shape:
+                overlay = np.empty_like(frame)
+                overlay_mask = np.empty(frame.shape[:2], dtype=np.uint8)
+                overlay_key = None
+            if texts != overlay_key:
+                render_overlay(texts, overlay, overlay_mask)
+                overlay_key = texts
+            cv2.copyTo(overlay, overlay_mask, frame)
+
+            # Display the main frame with drowsiness detection
+            cv2.imshow("Sleep Detector (MediaPipe)", frame)
+
+            # Display debug frame with mesh visualization if in debug mode
             if debug_mode:
-                cv2.putText(frame, "No face detected", (10, 150),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-            # Gradually decrease counter when no face is detected
-            # This prevents immediate reset if face detection temporarily fails
-            COUNTER = max(0, COUNTER - 1)
-
-        # Display the current status on the frame
-        cv2.putText(frame, status_text, (10, 60),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, config.TEXT_COLOR, 2)
-
-        # Display timestamp on the frame for logging purposes
-        timestamp = datetime.now().strftime("%A %d %B %Y %I:%M:%S%p")
-        cv2.putText(frame, timestamp, (10, frame.shape[0] - 40),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 255), 1)
-
-        # Display the main frame with drowsiness detection
-        cv2.imshow("Sleep Detector (MediaPipe)", frame)
-
-        # Display debug frame with mesh visualization if in debug mode
-        if debug_mode:
-            cv2.imshow("Debug View", debug_frame)
-
-        # Process keyboard input for interactivity
-        key = cv2.waitKey(1) & 0xFF
-
-        # Break the loop on 'q' key press (quit)
-        if key == ord("q"):
-            break
-
-        # Toggle debug mode on 'd' key press
-        elif key == ord("d"):
-            debug_mode = not debug_mode
-            # Close debug window if debug mode is turned off
-            if not debug_mode and 'debug_frame' in locals():
-                cv2.destroyWindow("Debug View")
-
-        # Reset statistics on 'r' key press
-        elif key == ord("r"):
-            COUNTER = 0
-            ear_history = []
-            print("[INFO] Counters reset")
-
-    # Clean up resources when exiting
-    vs.release()
-    cv2.destroyAllWindows()
+                cv2.imshow("Debug View", debug_frame)
+
+            # Process keyboard input for interactivity
+            # A 5 ms poll is still far below human key response time
+            key = cv2.waitKey(5) & 0xFF
+
+            # Break the loop on 'q' key press (quit)
+            if key == ord("q"):
+                break
+
+            # Toggle debug mode on 'd' key press
+            elif key == ord("d"):
+                debug_mode = not debug_mode
+                # Close debug window if debug mode is turned off
+                if not debug_mode and debug_frame is not None:
+                    cv2.destroyWindow("Debug View")
+                # Force fresh inference after the mode change
+                cache_reset.set()
+
+            # Reset statistics on 'r' key press
+            elif key == ord("r"):
+                COUNTER = 0
+                ear_history.clear()
+                ear_sum = 0.0
+                print("[INFO] Counters reset")
+    finally:
+        # Clean up resources when exiting, also after an error or Ctrl+C
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=1.0)
+        vs.release()
+        face_mesh.close()
+        # No windows exist headless (and headless OpenCV builds lack HighGUI)
+        if not args.headless:
+            cv2.destroyAllWindows()
     print("[INFO] Sleep detection system stopped")
 
 # Entry point of the application
@@ -4,10 +4,15 @@ Test installation script for SleepDriver.
 This script verifies that all required dependencies are installed correctly.
 """
 
+import os
 import sys
+import importlib.metadata
 import importlib.util
 import subprocess
 
+# Directory holding markers of checks that already passed
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sleepdriver")
+
 def check_module(module_name):
     """Check if a Python module is installed."""
     spec = importlib.util.find_spec(module_name)
@@ -34,6 +39,10 @@ def check_installation():
         print("[INFO] Install them using: pip install " + " ".join(missing_modules))
         return False
 
+    # Optional accelerators - SleepDriver runs without them
+    if not check_module("numba"):
+        print("[INFO] Optional package numba is not installed (NumPy fallbacks will be used).")
+
     return True
 
 def test_camera():
@@ -54,27 +63,52 @@ def test_camera():
         print(f"[ERROR] Camera test failed: {e}")
         return False
 
+def mediapipe_marker():
+    """Return the success marker path for the installed MediaPipe version, or None."""
+    try:
+        version = importlib.metadata.version("mediapipe")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+    return os.path.join(CACHE_DIR, f"mediapipe_graph_ok_{version}")
+
 def test_mediapipe():
-    """Test if MediaPipe Face Mesh works."""
+    """
+    Test if MediaPipe Face Mesh works.
+
+    Builds the same Face Mesh graph the application runs (face_mesh_graph.AsyncFaceMesh)
+    and processes a blank frame through it.
+
+    Loading the Face Mesh models takes several seconds, so a successful run is
+    remembered per MediaPipe version and skipped on later runs.
+    """
+    marker = mediapipe_marker()
+    if marker is not None and os.path.exists(marker):
+        print("[SUCCESS] MediaPipe Face Mesh test passed (cached result for this MediaPipe version).")
+        return True
+
     try:
-        import cv2
-        import mediapipe as mp
         import numpy as np
+        from face_mesh_graph import AsyncFaceMesh
 
         # Create a simple test image
         test_image = np.zeros((100, 100, 3), dtype=np.uint8)
 
-        # Initialize MediaPipe Face Mesh
-        mp_face_mesh = mp.solutions.face_mesh
-        face_mesh = mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        # Build the Face Mesh graph used by the application
+        face_mesh = AsyncFaceMesh(max_num_faces=1, refine_landmarks=True)
 
         # Try to process the image
-        results = face_mesh.process(cv2.cvtColor(test_image, cv2.COLOR_BGR2RGB))
+        try:
+            face_mesh.process(test_image)
+        finally:
+            face_mesh.close()
+
+        # Remember the success for this MediaPipe version
+        if marker is not None:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                open(marker, "a").close()
+            except OSError:
+                pass
 
         print("[SUCCESS] MediaPipe Face Mesh test passed.")
         return True